@@ -1,7 +1,9 @@
+import hashlib
 import pathlib
+import typing
 
 from aiohttp import web
-from aiohttp.web_exceptions import HTTPUnprocessableEntity
+from aiohttp.web_exceptions import HTTPNotFound, HTTPUnprocessableEntity
 
 try:
     from discord.ext.ipc import Client
@@ -10,59 +12,99 @@ except ImportError:
 else:
     _discord_installed = True
 
-from ..modules.utility import request_data_to_model
-from .dependencies import session_dependency, discord_session_dependency
+from ..models import JSONResponse, ReqLogin, ReqMMTResult, ReqEmailVerification, Session
+from ..modules.utility import request_data_to_model, json_dumps, json_loads, coalesce
 from ..client import HAuth
 
 
 __all__ = ["HAuthAiohttp", "HAuthDiscord"]
 
 
-def HAuthAiohttp(
+def _register_routes(
     app: web.Application,
-    client: HAuth
+    client: HAuth,
+    get_session: typing.Callable[[str], typing.Awaitable[typing.Union[Session, None]]],
+    handle_request: typing.Callable[
+        [str, typing.Union[None, ReqLogin, ReqMMTResult, ReqEmailVerification]],
+        typing.Awaitable[typing.Union[JSONResponse, None]]
+    ]
 ) -> web.Application:
-    """Initialize HoYoLab Auth for aiohttp app.
-
-    This will attach the necessary routes and HAuth to the aiohttp app.
+    """Attach HAuth routes to the aiohttp app.
 
     Args:
         app (web.Application): The aiohttp app.
         client (HAuth): The HAuth client.
+        get_session (typing.Callable): Coroutine function returning the session by its ID or `None`.
+        handle_request (typing.Callable): Coroutine function handling login API requests by session ID.
+            Returns `None` if the session does not exist.
     """
-    setattr(app, "hauth", client)
     routes = web.RouteTableDef()
 
-    @routes.get(f"{client.config.login_path}/{{session_id}}")
+    login_path = f"{client.config.login_path}/{{session_id}}"
+    api_login_path = f"{client.config.api_login_path}/{{session_id}}"
+    get_login_page = client._get_login_page
+
+    @routes.get(login_path)
     async def login(request: web.Request) -> web.Response:
         """Login page route."""
-        session = await session_dependency(request)
-        return web.Response(text=client._get_login_page(session), content_type="text/html")
+        session = await get_session(request.match_info["session_id"])
+        if not session:
+            raise HTTPNotFound()
+        return web.Response(text=get_login_page(session), content_type="text/html")
 
-    @routes.post(f"{client.config.api_login_path}/{{session_id}}")
+    @routes.post(api_login_path)
     async def api_login(request: web.Request) -> web.Response:
         """API login route."""
-        session = await session_dependency(request)
-
-        data = await request.json() if request.can_read_body else None
         try:
-            data = request_data_to_model(data)
-        except Exception:
-            raise HTTPUnprocessableEntity()
-
-        rsp = await client._handle_request(session, data)
-        return web.json_response(rsp.content, status=rsp.status_code)
+            data = request_data_to_model(await request.json(loads=json_loads) if request.can_read_body else None)
+        except (ValueError, TypeError):  # Includes JSON decode and pydantic validation errors
+            if not await get_session(request.match_info["session_id"]):  # Unknown sessions are 404 whatever the body
+                raise HTTPNotFound() from None
+            raise HTTPUnprocessableEntity() from None
+
+        rsp = await handle_request(request.match_info["session_id"], data)
+        if not rsp:
+            raise HTTPNotFound()
+        return web.Response(
+            body=json_dumps(rsp.content),
+            status=rsp.status_code,
+            content_type="application/json"
+        )
 
     if not client.config.use_custom_js:
+        js = pathlib.Path(client.config.js_file_path or pathlib.Path(__file__).parent / "../assets/js.js").read_bytes()
+        js_headers = {
+            "ETag": f'"{hashlib.sha256(js).hexdigest()[:16]}"',
+            "Cache-Control": "public, max-age=86400"
+        }
+
         @routes.get(f"{client.config.js_path}")
-        async def geetest(request: web.Request) -> web.FileResponse:
+        async def geetest(request: web.Request) -> web.Response:
             """Geetest JS route."""
-            return web.FileResponse(client.config.js_file_path or pathlib.Path(__file__).parent / "../assets/js.js")
+            if request.headers.get("If-None-Match") == js_headers["ETag"]:
+                return web.Response(status=304, headers=js_headers)
+            return web.Response(body=js, content_type="application/javascript", headers=js_headers)
 
     app.add_routes(routes)
     return app
 
 
+def HAuthAiohttp(
+    app: web.Application,
+    client: HAuth
+) -> web.Application:
+    """Initialize HoYoLab Auth for aiohttp app.
+
+    This will attach the necessary routes and HAuth to the aiohttp app.
+
+    Args:
+        app (web.Application): The aiohttp app.
+        client (HAuth): The HAuth client.
+    """
+    setattr(app, "hauth", client)
+    return _register_routes(app, client, client.get_session, client.handle_request_by_id)
+
+
 def HAuthDiscord(
     app: web.Application,
     client: HAuth,
@@ -85,37 +127,24 @@ def HAuthDiscord(
     setattr(app, "hauth", client)
     setattr(app, "ipc", ipc)
 
-    routes = web.RouteTableDef()
-
-    @routes.get(f"{client.config.login_path}/{{session_id}}")
-    async def login(request: web.Request) -> web.Response:
-        """Login page route."""
-        session = await discord_session_dependency(request)
-        return web.Response(text=client._get_login_page(session), content_type="text/html")
-
-    @routes.post(f"{client.config.api_login_path}/{{session_id}}")
-    async def api_login(request: web.Request) -> web.Response:
-        """API login route."""
-        session = await discord_session_dependency(request)
-
-        data = await request.json() if request.can_read_body else None
-        try:
-            data = request_data_to_model(data)
-        except Exception:
-            raise HTTPUnprocessableEntity()
-
+    @coalesce
+    async def get_session(session_id: str) -> typing.Union[Session, None]:
+        """Get session from discord Bot by ID. Concurrent lookups of the same session share one IPC request."""
+        rsp = await ipc.request("get_session", session_id=session_id)
+        return Session(**rsp.response) if rsp.response else None
+
+    async def handle_request(
+        session_id: str,
+        data: typing.Union[None, ReqLogin, ReqMMTResult, ReqEmailVerification]
+    ) -> typing.Union[JSONResponse, None]:
+        """Forward the request to discord Bot. The bot loads the session itself, so it takes one IPC request."""
         rsp = await ipc.request(
-            "handle_request",
-            session=session.model_dump(mode="json"),
-            data=data.model_dump(mode="json") if data else None
+            "handle_request_by_id",
+            session_id=session_id,
+            data=data.__pydantic_serializer__.to_python(data, mode="json") if data else None
         )
-        return web.json_response(rsp.response["content"], status=rsp.response["status_code"])
-
-    if not client.config.use_custom_js:
-        @routes.get(f"{client.config.js_path}")
-        async def geetest(request: web.Request) -> web.FileResponse:
-            """Geetest JS route."""
-            return web.FileResponse(client.config.js_file_path or pathlib.Path(__file__).parent / "../assets/js.js")
+        if not rsp.response:
+            return None
+        return JSONResponse.model_construct(**rsp.response)  # Built by HAuth on the bot side
 
-    app.add_routes(routes)
-    return app
+    return _register_routes(app, client, get_session, handle_request)
@@ -1,5 +1,8 @@
 """HoYoLab Auth main class."""
 import asyncio
+import collections
+import contextlib
+import time
 import typing
 from pathlib import Path
 
@@ -8,14 +11,22 @@ import genshin
 from .models.request import JSONResponse, ReqLogin, ReqMMTResult, ReqEmailVerification
 from .storages.base import SessionsStorage
 from .modules.geetest import get_lang_from_language
-from .models.session import Session, State
-from .modules.fprocessor import process
+from .models.session import PartialSession, Session, State
+from .modules.fprocessor import render
 from .models.config import Config
+from .models.localization import FALLBACK_LANGUAGE
 
 
 __all__ = ["HAuth"]
 
 
+_PARTIAL_SESSION_FIELDS = frozenset(PartialSession.model_fields)
+"""Session fields exposed to the client. Used to dump sessions without building a `PartialSession`."""
+
+_SESSION_CACHE_SIZE = 1024
+"""Maximum number of sessions kept in the in-process cache. The least recently used ones are dropped first."""
+
+
 class HAuth:
     """HoYoLab Auth main class."""
 
@@ -29,22 +40,89 @@ class HAuth:
         self.storage = storage
         """Session storage."""
 
-    def _get_login_page(self, session: Session) -> str:
-        """Process HTML with HoYoLab Auth."""
-        partial_session = session.get_partial()
-        return process(
-            self.config.login_page_path or Path(__file__).parent.joinpath("assets/login.html"),
-            session.language,
+        self._login_template = Path(
+            self.config.login_page_path or Path(__file__).parent.joinpath("assets/login.html")
+        ).read_text(encoding="utf-8")
+        """Login page template. Read once instead of on every login page request."""
+        self._login_page_data: typing.Dict[str, str] = {
+            "js_path": self.config.js_path,
+            "api_login_path": self.config.api_login_path,
+            "callback_url": self.config.callback_url or "",
+            "session": "{{session}}",  # Filled in for each request
+            "color": self.config.login_page_style.color.value,
+            "theme_mode": self.config.login_page_style.theme_mode.value,
+        }
+        """Language independent values inserted into the login page."""
+        self._login_pages: typing.Dict[str, typing.List[str]] = {}
+        """Rendered login pages by language, split around the session placeholder."""
+
+        localization = self.config.localization
+        self._error_payloads: typing.Dict[typing.Tuple[str, str], typing.Dict[str, typing.Any]] = {
+            (error, language): {
+                "error": {
+                    "title": localization.resolve(language, f"{error}_title"),
+                    "message": localization.resolve(language, f"{error}_message")
+                }
+            }
+            for error in ("invalid_request_body", "login_failed", "email_verification_failed")
+            for language in localization.languages
+        }
+        """Localized error response payloads by error name and language."""
+
+        self._state_handlers: typing.Dict[
+            State,
+            typing.Tuple[
+                type,
+                typing.Callable[[Session, typing.Any], typing.Awaitable[typing.Tuple[Session, typing.Optional[JSONResponse]]]]
+            ]
+        ] = {
+            State.LOGIN_REQUIRED: (ReqLogin, self._process_login),
+            State.LOGIN_GEETEST_TRIGGERED: (ReqMMTResult, self._process_login_geetest),
+            State.EMAIL_VERIFICATION_TRIGGERED: (ReqEmailVerification, self._process_email_verification),
+            State.EMAIL_GEETEST_TRIGGERED: (ReqMMTResult, self._process_email_geetest),
+        }
+        """Expected request data model and its handler by session state."""
+
+        self._callbacks: typing.Optional[asyncio.Queue] = None
+        """Queue of callbacks and their sessions waiting to be run by the workers."""
+        self._workers: typing.List[asyncio.Task] = []
+        """Background tasks running queued callbacks."""
+        self._finishing: typing.Set[str] = set()
+        """IDs of successfully logged in sessions whose `on_success` callback is queued or running."""
+
+        self._session_cache: typing.OrderedDict[str, typing.Tuple[Session, float]] = collections.OrderedDict()
+        """Sessions cached in-process with their monotonic expiration time, least recently used first."""
+        self._session_lookups: typing.Dict[str, asyncio.Future] = {}
+        """Storage lookups in progress by session ID."""
+
+    def _render_login_page(self, language: str) -> str:
+        """Render everything but the session into the login page template."""
+        return render(
+            self._login_template,
+            language,
             self.config.localization,
-            js_path=self.config.js_path,
-            api_login_path=self.config.api_login_path,
-            callback_url=self.config.callback_url or "",
-            session=partial_session.model_dump_json(),
-            color=self.config.login_page_style.color.value,
-            theme_mode=self.config.login_page_style.theme_mode.value,
-            geetest_lang=get_lang_from_language(session.language),
+            **self._login_page_data,
+            geetest_lang=get_lang_from_language(language),
+        )
+
+    def _error_payload(self, error: str, language: str) -> typing.Dict[str, typing.Any]:
+        """Get localized error response payload. Falls back to English for unknown languages."""
+        return self._error_payloads.get((error, language)) or self._error_payloads[(error, FALLBACK_LANGUAGE)]
+
+    def _partial_response(self, session: Session) -> JSONResponse:
+        """Build a response with partial (safe) session, without building a `PartialSession`."""
+        return JSONResponse.model_construct(  # Content is already valid, no need to validate it again
+            status_code=200,
+            content=session.__pydantic_serializer__.to_python(session, mode="json", include=_PARTIAL_SESSION_FIELDS)
         )
 
+    def _get_login_page(self, session: Session) -> str:
+        """Process HTML with HoYoLab Auth."""
+        parts = self._login_pages.get(session.language)
+        if parts is None:
+            parts = self._login_pages[session.language] = self._render_login_page(session.language).split("{{session}}")
+        return session.__pydantic_serializer__.to_json(session, include=_PARTIAL_SESSION_FIELDS).decode().join(parts)
+
     async def _define_session_state(self, session: Session) -> Session:
         """Define the state of the session.
 
@@ -73,7 +151,7 @@ class HAuth:
             ticket (typing.Optional[genshin.models.ActionTicket]): Email verification ticket.
         """
         try:
-            client = genshin.Client()
+            client = genshin.Client()  # Not shared: a successful login stores the user's cookies in the client
             result = await client._app_login(session.account, session.password, encrypted=True, mmt_result=mmt_result, ticket=ticket)
 
             if isinstance(result, genshin.models.SessionMMT):
@@ -111,159 +189,217 @@ class HAuth:
             session.state = State.EMAIL_VERIFICATION_TRIGGERED
             return (session, False)
 
+    async def _process_request_data(
+        self,
+        session: Session,
+        data: typing.Union[ReqLogin, ReqMMTResult, ReqEmailVerification]
+    ) -> typing.Tuple[Session, typing.Optional[JSONResponse]]:
+        """Move the session to the next state using request data.
+
+        Returns the session and an error response, if the request could not be processed.
+        Does not write the session to the storage.
+
+        Args:
+            session (Session): The session to process the request data for.
+            data (typing.Union[ReqLogin, ReqMMTResult, ReqEmailVerification]): Request data.
+        """
+        state_handler = self._state_handlers.get(session.state)
+        if state_handler is None:
+            return session, None
+
+        expected_data, handler = state_handler
+        if not isinstance(data, expected_data):
+            return session, JSONResponse(
+                status_code=422, 
+                content=self._error_payload("invalid_request_body", session.language)
+            )
+        return await handler(session, data)
+
+    async def _process_login(
+        self,
+        session: Session,
+        data: ReqLogin
+    ) -> typing.Tuple[Session, typing.Optional[JSONResponse]]:
+        """Try to login with user's credentials (`LOGIN_REQUIRED` state)."""
+        session.account = data.account
+        session.password = data.password
+
+        session = await self._login_session(session)
+
+        if session.state == State.LOGIN_REQUIRED:  # Login failed
+            return session, JSONResponse(
+                status_code=200, 
+                content=self._error_payload("login_failed", session.language)
+            )
+        return session, None
+
+    async def _process_login_geetest(
+        self,
+        session: Session,
+        data: ReqMMTResult
+    ) -> typing.Tuple[Session, typing.Optional[JSONResponse]]:
+        """Try to login with solved geetest (`LOGIN_GEETEST_TRIGGERED` state)."""
+        session = await self._login_session(session, mmt_result=data.mmt_result)
+
+        if session.state == State.LOGIN_REQUIRED:  # Login failed
+            return session, JSONResponse(
+                status_code=200, 
+                content=self._error_payload("login_failed", session.language)
+            )
+        return session, None
+
+    async def _process_email_verification(
+        self,
+        session: Session,
+        data: ReqEmailVerification
+    ) -> typing.Tuple[Session, typing.Optional[JSONResponse]]:
+        """Try to verify the email and login afterwards (`EMAIL_VERIFICATION_TRIGGERED` state)."""
+        session, email_verified = await self._email_verify_session(
+            session, 
+            code=data.code, 
+            ticket=session.ticket
+        )
+        if not email_verified:  # Verification failed
+            return session, JSONResponse(
+                status_code=200, 
+                content=self._error_payload("email_verification_failed", session.language)
+            )
+        session = await self._login_session(session, ticket=session.ticket)
+        return session, None
+
+    async def _process_email_geetest(
+        self,
+        session: Session,
+        data: ReqMMTResult
+    ) -> typing.Tuple[Session, typing.Optional[JSONResponse]]:
+        """Try to verify the email with solved geetest (`EMAIL_GEETEST_TRIGGERED` state)."""
+        session, email_verified = await self._email_verify_session(
+            session,
+            mmt_result=data.mmt_result,
+            ticket=session.ticket
+        )
+        if not email_verified:  # Verification failed
+            return session, JSONResponse(
+                status_code=200, 
+                content=self._error_payload("email_verification_failed", session.language)
+            )
+        return session, None
+
     async def _handle_request(
         self,
         session: Session,
         data: typing.Union[None, ReqLogin, ReqMMTResult, ReqEmailVerification] = None
     ) -> JSONResponse:
         """Handle the request. This method can be used to process request from any framework.
+
+        The session is written to the storage once, after all state transitions are done.
         
         Args:
             session (Session): The session to handle the request for.
             data (typing.Union[None, ReqLogin, ReqMMTResult, ReqEmailVerification]): Request data.
         """
+        if data is None and session.state != State.UNDEFINED:  # Client only asks for the state
+            return self._partial_response(session)
+
         try:
+            response = None
+            finish = False
+            previous_state = session.state
+
             if session.state == State.UNDEFINED:
                 session = await self._define_session_state(session)
 
-                if session.state == State.SUCCESS and self.config.on_success:
-                    asyncio.create_task(self.config.on_success(session))
-                    await self.delete_session(session.id)
-
-            if not data:  # Client does not know the state of the session
-                await self.update_session(session.id, session)
-                return JSONResponse(status_code=200, content=session.get_partial().model_dump(mode="json"))
-
-            if session.state == State.LOGIN_REQUIRED:
-                if not isinstance(data, ReqLogin):
-                    await self.update_session(session.id, session)
-                    return JSONResponse(
-                        status_code=422, 
-                        content={
-                            "error": {
-                                "title": self.config.localization.invalid_request_body_title[session.language],
-                                "message": self.config.localization.invalid_request_body_message[session.language]
-                            }
-                        }
-                    )
-                session.account = data.account
-                session.password = data.password
-
-                session = await self._login_session(session)
-
-                if session.state == State.LOGIN_REQUIRED:  # Login failed
-                    await self.update_session(session.id, session)
-                    return JSONResponse(
-                        status_code=200, 
-                        content={
-                            "error": {
-                                "title": self.config.localization.login_failed_title[session.language],
-                                "message": self.config.localization.login_failed_message[session.language]
-                            }
-                        }
-                    )
-
-            elif session.state == State.LOGIN_GEETEST_TRIGGERED:
-                if not isinstance(data, ReqMMTResult):
-                    await self.update_session(session.id, session)
-                    return JSONResponse(
-                        status_code=422, 
-                        content={
-                            "error": {
-                                "title": self.config.localization.invalid_request_body_title[session.language],
-                                "message": self.config.localization.invalid_request_body_message[session.language]
-                            }
-                        }
-                    )
-                session = await self._login_session(session, mmt_result=data.mmt_result)
-
-                if session.state == State.LOGIN_REQUIRED:  # Login failed
-                    await self.update_session(session.id, session)
-                    return JSONResponse(
-                        status_code=200, 
-                        content={
-                            "error": {
-                                "title": self.config.localization.login_failed_title[session.language],
-                                "message": self.config.localization.login_failed_message[session.language]
-                            }
-                        }
-                    )
-
-            elif session.state == State.EMAIL_VERIFICATION_TRIGGERED:
-                if not isinstance(data, ReqEmailVerification):
-                    await self.update_session(session.id, session)
-                    return JSONResponse(
-                        status_code=422, 
-                        content={
-                            "error": {
-                                "title": self.config.localization.invalid_request_body_title[session.language],
-                                "message": self.config.localization.invalid_request_body_message[session.language]
-                            }
-                        }
-                    )
-                session, email_verified = await self._email_verify_session(
-                    session, 
-                    code=data.code, 
-                    ticket=session.ticket
-                )
-                if not email_verified:  # Verification failed
-                    await self.update_session(session.id, session)
-                    return JSONResponse(
-                        status_code=200, 
-                        content={
-                            "error": {
-                                "title": self.config.localization.email_verification_failed_title[session.language],
-                                "message": self.config.localization.email_verification_failed_message[session.language]
-                            }
-                        }
-                    )
-                session = await self._login_session(session, ticket=session.ticket)
-
-            elif session.state == State.EMAIL_GEETEST_TRIGGERED:
-                if not isinstance(data, ReqMMTResult):
-                    await self.storage.update_session(session.id, session)
-                    return JSONResponse(
-                        status_code=422, 
-                        content={
-                            "error": {
-                                "title": self.config.localization.invalid_request_body_title[session.language],
-                                "message": self.config.localization.invalid_request_body_message[session.language]
-                            }
-                        }
-                    )
-                session, email_verified = await self._email_verify_session(
-                    session,
-                    mmt_result=data.mmt_result,
-                    ticket=session.ticket
+            if data:  # Otherwise client does not know the state of the session
+                session, response = await self._process_request_data(session, data)
+
+            if response is None:
+                # Only the request that logged the session in queues `on_success`
+                finish = (
+                    session.state == State.SUCCESS
+                    and previous_state != State.SUCCESS
+                    and self.config.on_success is not None
+                    and session.id not in self._finishing
                 )
-                if not email_verified:  # Verification failed
-                    await self.update_session(session.id, session)
-                    return JSONResponse(
-                        status_code=200, 
-                        content={
-                            "error": {
-                                "title": self.config.localization.email_verification_failed_title[session.language],
-                                "message": self.config.localization.email_verification_failed_message[session.language]
-                            }
-                        }
-                    )
-
-            if session.state == State.SUCCESS and self.config.on_success:
-                asyncio.create_task(self.config.on_success(session))
-                await self.delete_session(session.id)
+                if finish:
+                    self._finishing.add(session.id)
+                response = self._partial_response(session)
 
+            # Stored as `SUCCESS` until `_finish_login` deletes it, so later requests do not log in again
             await self.update_session(session.id, session)
-            return JSONResponse(status_code=200, content=session.get_partial().model_dump(mode="json"))
+            if finish:
+                await self._callbacks.put((self._finish_login, session))
+            return response
 
         except Exception as e:
+            if finish:
+                self._finishing.discard(session.id)
+            self._session_cache.pop(session.id, None)  # The cached session may have been changed in place
             if self.config.on_error:
                 asyncio.create_task(self.config.on_error(session, e))
-            raise e
+            raise
+
+    async def handle_request_by_id(
+        self,
+        session_id: str,
+        data: typing.Union[None, ReqLogin, ReqMMTResult, ReqEmailVerification] = None
+    ) -> typing.Union[JSONResponse, None]:
+        """Handle the request for a session by its ID. Returns `None` if the session does not exist.
+
+        Lets remote web servers (e.g. over Discord IPC) handle a login API request in a single call.
+
+        Args:
+            session_id (str): The ID of the session to handle the request for.
+            data (typing.Union[None, ReqLogin, ReqMMTResult, ReqEmailVerification]): Request data.
+        """
+        session = await self.get_session(session_id)
+        if not session:
+            return None
+        return await self._handle_request(session, data)
+
+    async def _finish_login(self, session: Session) -> None:
+        """Run `on_success` callback for the session and delete it afterwards."""
+        try:
+            await self.config.on_success(session)
+        finally:
+            try:
+                await self.delete_session(session.id)
+            finally:
+                self._finishing.discard(session.id)
+
+    async def _run_callbacks(self) -> None:
+        """Coroutine function to run queued callbacks one by one."""
+        while True:
+            callback, session = await self._callbacks.get()
+            try:
+                await callback(session)
+            except Exception as e:
+                if self.config.on_error:
+                    with contextlib.suppress(Exception):  # Keep the worker alive
+                        await self.config.on_error(session, e)
+            finally:
+                self._callbacks.task_done()
 
     async def initialize(self) -> None:
         """Initialize HoYoLab Auth."""
         await self.storage.initialize()
 
+        self._callbacks = asyncio.Queue(maxsize=self.config.callback_queue_size)
+        self._workers = [
+            asyncio.create_task(self._run_callbacks())
+            for _ in range(self.config.callback_workers)
+        ]
+
+    async def close(self) -> None:
+        """Close HoYoLab Auth.
+
+        Waits for queued `on_success` callbacks to finish and stops the workers running them.
+        """
+        if self._callbacks is not None:
+            await self._callbacks.join()
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+
     async def create_session(
         self,
         data: typing.Optional[typing.Dict[typing.Any, typing.Any]] = None,
@@ -287,13 +423,56 @@ class HAuth:
         """
         return await self.storage.create_session(data, language, account, password, mmt, ticket, login_result)
 
+    def _cache_session(self, session: Session) -> None:
+        """Put a session into the in-process cache, dropping the least recently used one when it is full.
+
+        The entry is kept at most until the session expires, as the storage deletes expired sessions itself.
+        """
+        ttl = self.config.session_cache_ttl
+        if session.expiration_time is not None:
+            ttl = min(ttl, session.expiration_time - time.time())
+        self._session_cache[session.id] = (session, time.monotonic() + ttl)
+        self._session_cache.move_to_end(session.id)
+        if len(self._session_cache) > _SESSION_CACHE_SIZE:
+            self._session_cache.popitem(last=False)
+
+    def _get_cached_session(self, id: str) -> typing.Union[Session, None]:
+        """Get a session from the in-process cache. Expired entries and sessions are dropped."""
+        cached = self._session_cache.get(id)
+        if cached is None:
+            return None
+        expiration_time = cached[0].expiration_time
+        if cached[1] <= time.monotonic() or (expiration_time is not None and expiration_time <= time.time()):
+            del self._session_cache[id]
+            return None
+        self._session_cache.move_to_end(id)
+        return cached[0]
+
     async def get_session(self, id: str) -> typing.Union[Session, None]:
         """Get a session.
 
+        If `session_cache_ttl` is set, the session is served from the in-process
+        cache and concurrent lookups of the same ID share a single storage call.
+
         Args:
             id (str): The ID of the session.
         """
-        return await self.storage.get_session(id)
+        if not self.config.session_cache_ttl:
+            return await self.storage.get_session(id)
+
+        cached = self._get_cached_session(id)
+        if cached:
+            return cached
+
+        lookup = self._session_lookups.get(id)
+        if lookup is None:
+            lookup = self._session_lookups[id] = asyncio.ensure_future(self.storage.get_session(id))
+            lookup.add_done_callback(lambda _: self._session_lookups.pop(id, None))
+
+        session = await asyncio.shield(lookup)
+        if session:
+            self._cache_session(session)
+        return session
 
     async def update_session(self, id: str, session: Session) -> None:
         """Update a session.
@@ -302,7 +481,13 @@ class HAuth:
             id (str): The ID of the session.
             session (Session): The new session object.
         """
-        await self.storage.update_session(id, session)
+        try:
+            await self.storage.update_session(id, session)
+        except Exception:
+            self._session_cache.pop(id, None)  # The cached session may have been changed in place
+            raise
+        if self.config.session_cache_ttl:
+            self._cache_session(session)
 
     async def delete_session(self, id: str) -> None:
         """Delete a session.
@@ -311,3 +496,4 @@ class HAuth:
             id (str): The ID of the session.
         """
         await self.storage.delete_session(id)
+        self._session_cache.pop(id, None)
@@ -1,10 +1,11 @@
 """HAuth wrapper for FastAPI application."""
+import hashlib
 import typing
 import pathlib
 
 try:
-    from fastapi import FastAPI, Depends
-    from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+    from fastapi import FastAPI, Depends, HTTPException, Request
+    from fastapi.responses import HTMLResponse, Response
 except ImportError:
     _fastapi_installed = False
 else:
@@ -18,6 +19,7 @@ else:
     _discord_installed = True
 
 from ..models import ReqLogin, ReqMMTResult, ReqEmailVerification, Session
+from ..modules.utility import json_dumps
 from .dependencies import session_dependency, discord_session_dependency
 from ..client import HAuth
 
@@ -25,6 +27,22 @@ from ..client import HAuth
 __all__ = ["HAuthFastAPI", "HAuthDiscord"]
 
 
+def _add_js_route(app: "FastAPI", client: HAuth) -> None:
+    """Attach the geetest JS route. The file is read once and served from memory."""
+    js = pathlib.Path(client.config.js_file_path or pathlib.Path(__file__).parent / "../assets/js.js").read_bytes()
+    js_headers = {
+        "ETag": f'"{hashlib.sha256(js).hexdigest()[:16]}"',
+        "Cache-Control": "public, max-age=86400"
+    }
+
+    @app.get(client.config.js_path)
+    async def geetest(request: Request) -> Response:
+        """Geetest JS route."""
+        if request.headers.get("If-None-Match") == js_headers["ETag"]:
+            return Response(status_code=304, headers=js_headers)
+        return Response(js, media_type="application/javascript", headers=js_headers)
+
+
 def HAuthFastAPI(
     app: "FastAPI",
     client: HAuth
@@ -42,25 +60,27 @@ def HAuthFastAPI(
 
     setattr(app, "hauth", client)
 
-    @app.get(f"{client.config.login_path}/" + "{session_id}")
+    login_path = f"{client.config.login_path}/{{session_id}}"
+    api_login_path = f"{client.config.api_login_path}/{{session_id}}"
+    get_login_page = client._get_login_page
+    handle_request = client._handle_request
+
+    @app.get(login_path)
     async def login(session: typing.Annotated[Session, Depends(session_dependency)]) -> HTMLResponse:
         """Login page route."""
-        return HTMLResponse(client._get_login_page(session))
+        return HTMLResponse(get_login_page(session))
 
-    @app.post(f"{client.config.api_login_path}/" + "{session_id}")
+    @app.post(api_login_path)
     async def api_login(
         session: typing.Annotated[Session, Depends(session_dependency)],
         data: typing.Union[None, ReqLogin, ReqMMTResult, ReqEmailVerification] = None
     ):
         """API login route."""
-        rsp = await client._handle_request(session, data)
-        return JSONResponse(rsp.content, status_code=rsp.status_code)
+        rsp = await handle_request(session, data)
+        return Response(json_dumps(rsp.content), status_code=rsp.status_code, media_type="application/json")
 
     if not client.config.use_custom_js:
-        @app.get(f"{client.config.js_path}")
-        async def geetest() -> FileResponse:
-            """Geetest JS route."""
-            return FileResponse(client.config.js_file_path or pathlib.Path(__file__).parent / "../assets/js.js")
+        _add_js_route(app, client)
 
     return app
 
@@ -89,28 +109,35 @@ def HAuthDiscord(
     setattr(app, "hauth", client)
     setattr(app, "ipc", ipc)
 
-    @app.get(f"{client.config.login_path}/" + "{session_id}")
+    login_path = f"{client.config.login_path}/{{session_id}}"
+    api_login_path = f"{client.config.api_login_path}/{{session_id}}"
+    get_login_page = client._get_login_page
+
+    @app.get(login_path)
     async def login(session: typing.Annotated[Session, Depends(discord_session_dependency)]) -> HTMLResponse:
         """Login page route."""
-        return HTMLResponse(client._get_login_page(session))
+        return HTMLResponse(get_login_page(session))
 
-    @app.post(f"{client.config.api_login_path}/" + "{session_id}")
+    @app.post(api_login_path)
     async def api_login(
-        session: typing.Annotated[Session, Depends(discord_session_dependency)],
+        session_id: str,
         data: typing.Union[None, ReqLogin, ReqMMTResult, ReqEmailVerification] = None
     ):
-        """API login route."""
+        """API login route. The bot loads the session itself, so it takes one IPC request."""
         rsp = await ipc.request(
-            "handle_request",
-            session=session.model_dump(mode="json"),
-            data=data.model_dump(mode="json") if data else None
+            "handle_request_by_id",
+            session_id=session_id,
+            data=data.__pydantic_serializer__.to_python(data, mode="json") if data else None
+        )
+        if not rsp.response:
+            raise HTTPException(status_code=404)
+        return Response(
+            json_dumps(rsp.response["content"]),
+            status_code=rsp.response["status_code"],
+            media_type="application/json"
         )
-        return JSONResponse(rsp.response["content"], status_code=rsp.response["status_code"])
 
     if not client.config.use_custom_js:
-        @app.get(f"{client.config.js_path}")
-        async def geetest() -> FileResponse:
-            """Geetest JS route."""
-            return FileResponse(client.config.js_file_path or pathlib.Path(__file__).parent / "../assets/js.js")
+        _add_js_route(app, client)
 
     return app
@@ -1,10 +1,13 @@
 """Dependencies for FastAPI routes."""
+import typing
+
 try:
     from fastapi import Request, HTTPException
 except ImportError:
     pass  # No need to check this since it is already checked in core.py
 
 from ..models import Session
+from ..modules.utility import coalesce
 
 
 __all__ = ["session_dependency", "discord_session_dependency"]
@@ -12,14 +15,20 @@ __all__ = ["session_dependency", "discord_session_dependency"]
 
 async def session_dependency(request: Request, session_id: str) -> Session:
     """Dependency to get session by ID."""
-    session = await request.app.hauth.storage.get_session(session_id)
+    session = await request.app.hauth.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404)
     return session
 
+@coalesce
+async def _get_discord_session(ipc: typing.Any, session_id: str) -> typing.Union[Session, None]:
+    """Get session from discord Bot by ID. Concurrent lookups of the same session share one IPC request."""
+    rsp = await ipc.request("get_session", session_id=session_id)
+    return Session(**rsp.response) if rsp.response else None
+
 async def discord_session_dependency(request: Request, session_id: str) -> Session:
     """Dependency to get session from discord Bot by ID."""
-    rsp = await request.app.ipc.request("get_session", session_id=session_id)
-    if not rsp.response:
+    session = await _get_discord_session(request.app.ipc, session_id)
+    if not session:
         raise HTTPException(status_code=404)
-    return Session(**rsp.response)
+    return session
@@ -11,7 +11,7 @@ from .localization import Localization
 __all__ = ["Config", "Color", "ThemeMode", "LoginPageStyle"]
 
 
-class Color(Enum):
+class Color(str, Enum):
     """Color for the login page."""
 
     RED = "red"
@@ -23,7 +23,7 @@ class Color(Enum):
     ORANGE = "orange"
 
 
-class ThemeMode(Enum):
+class ThemeMode(str, Enum):
     """Theme mode for the login page."""
 
     DARK = "dark"
@@ -53,6 +53,22 @@ class Config(pydantic.BaseModel):
     This function may be called more than once for a single session (if user tries to login multiple times).
     """
 
+    callback_workers: typing.Optional[int] = 4
+    """Number of background workers running `on_success` callbacks."""
+
+    callback_queue_size: typing.Optional[int] = 1024
+    """Maximum number of `on_success` callbacks waiting for a free worker.
+
+    When the queue is full, successful login requests wait until there is a place in the queue.
+    """
+
+    session_cache_ttl: typing.Optional[float] = None
+    """Time in seconds to keep sessions in HAuth's in-process cache. Disabled by default.
+
+    Useful with remote storages, where the same session is requested many times in a row.
+    Only enable it if this HAuth instance is the only one updating the sessions.
+    """
+
     login_path: typing.Optional[str] = "/login"
     """Path for login page. The structure of the url is `{login_path}/{session_id}`"""
 
@@ -105,7 +121,7 @@ class Config(pydantic.BaseModel):
     Only used if `login_page_path` is not provided.
     """
 
-    localization: typing.Optional[Localization] = pydantic.Field(default=Localization())
+    localization: typing.Optional[Localization] = pydantic.Field(default_factory=Localization)
     """Custom localization for HoYoLab Auth.
 
     Example usage:
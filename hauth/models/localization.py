@@ -7,134 +7,201 @@ import pydantic
 __all__ = ["Localization"]
 
 
-class Localization(pydantic.BaseModel):
-    """Localization class for HoYoLab Auth."""
+FALLBACK_LANGUAGE = "en"
+"""Language used for texts that are not translated into the requested language."""
 
-    default_error_title: typing.Mapping[str, str] = pydantic.Field(default={
+_DEFAULT_TEXTS: typing.Dict[str, typing.Dict[str, str]] = {
+    "default_error_title": {
         "en": "Something went wrong",
         "ru": "Что-то пошло не так"
-    })
-    """Default error title. Shown when server returns an error without details."""
-
-    default_error_message: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "default_error_message": {
         "en": "Unexpected error occurred when requesting the server. Status - ||status||.",
         "ru": "При выполнение запроса произошла непредвиденная ошибка. Статус - ||status||."
-    })
-    """"Default error description. Shown when server returns an error without details."""
-
-    login_page_title: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "login_page_title": {
         "en": "Login page",
         "ru": "Страница входа"
-    })
-    """Login page title."""
-
-    close: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "close": {
         "en": "Close",
         "ru": "Закрыть"
-    })
-    """Close button text."""
-
-    login_title: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "login_title": {
         "en": "Login with HoYoLab",
         "ru": "Вход через HoYoLab"
-    })
-    """Title for the login form."""
-
-    login_description: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "login_description": {
         "en": "<span>Note:</span> We are not affiliated with HoYoLab.",
         "ru": "<span>Обратите внимание:</span> Мы не связаны с HoYoLab."
-    })
-    """Hint for the login form."""
-
-    email: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "email": {
         "en": "Email",
         "ru": "Почта"
-    })
-    """Email field label."""
-
-    password: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "password": {
         "en": "Password",
         "ru": "Пароль"
-    })
-    """Password field label."""
-
-    login: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "login": {
         "en": "Login",
         "ru": "Войти"
-    })
-    """Login button text."""
-
-    email_verification_title: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "email_verification_title": {
         "en": "Email verification",
         "ru": "Проверка почты"
-    })
-    """Email verification title. Shown on login page when email verification is triggered."""
-
-    email_verification_description: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "email_verification_description": {
         "en": "Enter the code sent to your email.",
         "ru": "Введите код, отправленный вам на почту."
-    })
-    """Email verification description. Shown on login page when email verification is triggered."""
-
-    complete_title: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "complete_title": {
         "en": "Authorized",
         "ru": "Авторизован"
-    })
-    """Title shown on login page when the user is authorized."""
-
-    complete_description: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "complete_description": {
         "en": "Redirecting you in ||seconds|| seconds...",
         "ru": "Перенаправление через ||seconds|| секунд..."
-    })
-    """Description shown on login page when the user is authorized."""
-
-    complete_description_no_callback: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "complete_description_no_callback": {
         "en": "You can now close this window.",
         "ru": "Вы можете закрыть это окно."
-    })
-    """Description shown on login page when the user is authorized and callback url is not set."""
-
-    fields_empty: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "fields_empty": {
         "en": "Some fields are empty.",
         "ru": "Некоторые поля пустые."
-    })
-    """Error message shown on login page when some fields are empty."""
-
-    invalid_request_body_title: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "invalid_request_body_title": {
         "en": "Invalid request body.",
         "ru": "Неверное тело запроса."
-    })
-    """Error title sent by API when request body is invalid."""
-
-    invalid_request_body_message: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "invalid_request_body_message": {
         "en": "Request body is invalid. Please report this error to the developer or try again later.",
         "ru": "Некорректное тело запроса. Пожалуйста, сообщите об этой ошибке разработчику или попробуйте позже."
-    })
-    """Error message sent by API when request body is invalid."""
-
-    login_failed_title: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "login_failed_title": {
         "en": "Login failed.",
         "ru": "Вход не удался."
-    })
-    """Error title sent by API when login failed (Most likely because of invalid credentials)."""
-
-    login_failed_message: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "login_failed_message": {
         "en": "Could not login into your account. Please check your credentials and try again.",
         "ru": "Не удалось войти в аккаунт. Пожалуйста, проверьте ваши данные и попробуйте снова."
-    })
-    """Error message sent by API when login failed (Most likely because of invalid credentials)."""
-
-    email_verification_failed_title: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "email_verification_failed_title": {
         "en": "Email verification failed.",
         "ru": "Проверка почты не удалась."
-    })
-    """Error title sent by API when email verification failed (Most likely because of invalid code)."""
-
-    email_verification_failed_message: typing.Mapping[str, str] = pydantic.Field(default={
+    },
+    "email_verification_failed_message": {
         "en": "Could not verify your email. Please check the code and try again.",
         "ru": "Не удалось проверить вашу почту. Пожалуйста, проверьте код и попробуйте снова."
-    })
+    },
+}
+"""Default texts by localization field. Each instance gets its own copy of the texts."""
+
+
+class Localization(pydantic.BaseModel):
+    """Localization class for HoYoLab Auth."""
+
+    default_error_title: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["default_error_title"].copy)
+    """Default error title. Shown when server returns an error without details."""
+
+    default_error_message: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["default_error_message"].copy)
+    """"Default error description. Shown when server returns an error without details."""
+
+    login_page_title: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["login_page_title"].copy)
+    """Login page title."""
+
+    close: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["close"].copy)
+    """Close button text."""
+
+    login_title: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["login_title"].copy)
+    """Title for the login form."""
+
+    login_description: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["login_description"].copy)
+    """Hint for the login form."""
+
+    email: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["email"].copy)
+    """Email field label."""
+
+    password: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["password"].copy)
+    """Password field label."""
+
+    login: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["login"].copy)
+    """Login button text."""
+
+    email_verification_title: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["email_verification_title"].copy)
+    """Email verification title. Shown on login page when email verification is triggered."""
+
+    email_verification_description: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["email_verification_description"].copy)
+    """Email verification description. Shown on login page when email verification is triggered."""
+
+    complete_title: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["complete_title"].copy)
+    """Title shown on login page when the user is authorized."""
+
+    complete_description: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["complete_description"].copy)
+    """Description shown on login page when the user is authorized."""
+
+    complete_description_no_callback: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["complete_description_no_callback"].copy)
+    """Description shown on login page when the user is authorized and callback url is not set."""
+
+    fields_empty: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["fields_empty"].copy)
+    """Error message shown on login page when some fields are empty."""
+
+    invalid_request_body_title: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["invalid_request_body_title"].copy)
+    """Error title sent by API when request body is invalid."""
+
+    invalid_request_body_message: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["invalid_request_body_message"].copy)
+    """Error message sent by API when request body is invalid."""
+
+    login_failed_title: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["login_failed_title"].copy)
+    """Error title sent by API when login failed (Most likely because of invalid credentials)."""
+
+    login_failed_message: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["login_failed_message"].copy)
+    """Error message sent by API when login failed (Most likely because of invalid credentials)."""
+
+    email_verification_failed_title: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["email_verification_failed_title"].copy)
+    """Error title sent by API when email verification failed (Most likely because of invalid code)."""
+
+    email_verification_failed_message: typing.Mapping[str, str] = pydantic.Field(default_factory=_DEFAULT_TEXTS["email_verification_failed_message"].copy)
     """Error message sent by API when email verification failed (Most likely because of invalid code)."""
 
     model_config = pydantic.ConfigDict(extra="allow")
     """Allows to add any custom localization fields."""
+
+    _texts: typing.Dict[str, typing.Dict[str, str]] = pydantic.PrivateAttr(default_factory=dict)
+    """All texts by language, with missing translations filled from the fallback language."""
+
+    @pydantic.model_validator(mode="after")
+    def _resolve_texts(self) -> "Localization":
+        """Resolve texts of every language, filling missing translations from the fallback language."""
+        fields = self.model_dump()
+        languages = {language for value in fields.values() for language in value}
+        languages.add(FALLBACK_LANGUAGE)
+        fallback = {key: value.get(FALLBACK_LANGUAGE, "") for key, value in fields.items()}
+        self._texts = {
+            language: {key: value.get(language, fallback[key]) for key, value in fields.items()}
+            for language in languages
+        }
+        return self
+
+    @property
+    def languages(self) -> typing.List[str]:
+        """Languages with at least one translated text."""
+        return list(self._texts)
+
+    def texts(self, language: str) -> typing.Mapping[str, str]:
+        """Get all texts in the language. Falls back to English for unknown languages.
+
+        Args:
+            language (str): The language of the texts.
+        """
+        return self._texts.get(language) or self._texts[FALLBACK_LANGUAGE]
+
+    def resolve(self, language: str, key: str) -> str:
+        """Get a single text in the language. Falls back to English if it is not translated.
+
+        Args:
+            language (str): The language of the text.
+            key (str): Name of the localization field.
+        """
+        return self.texts(language)[key]
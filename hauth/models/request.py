@@ -14,6 +14,9 @@ class ReqMMTResult(pydantic.BaseModel):
     mmt_result: genshin.models.SessionMMTResult
     """Solve geetest data."""
 
+    model_config = pydantic.ConfigDict(frozen=True)
+    """Request data is read-only."""
+
 
 class ReqEmailVerification(pydantic.BaseModel):
     """Model containing email verification data."""
@@ -21,6 +24,9 @@ class ReqEmailVerification(pydantic.BaseModel):
     code: str
     """Verification data."""
 
+    model_config = pydantic.ConfigDict(frozen=True)
+    """Request data is read-only."""
+
 
 class ReqLogin(pydantic.BaseModel):
     """Model containing login data."""
@@ -31,6 +37,9 @@ class ReqLogin(pydantic.BaseModel):
     password: str
     """Encrypted user's password."""
 
+    model_config = pydantic.ConfigDict(frozen=True)
+    """Request data is read-only."""
+
 
 class JSONResponse(pydantic.BaseModel):
     """Represents JSON response from HAuth."""
@@ -1,5 +1,4 @@
 """Session class."""
-import datetime
 import json
 import typing
 import enum
@@ -7,11 +6,25 @@ import enum
 import genshin
 import pydantic
 
+try:
+    import orjson
+except ImportError:
+    _orjson_installed = False
+else:
+    _orjson_installed = True
+
 
 __all__ = ["State", "PartialSession", "Session"]
 
 
-class State(enum.Enum):
+def _parse_json(data: str) -> typing.Dict[str, typing.Any]:
+    """Parse JSON string, using orjson if installed."""
+    if _orjson_installed:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class State(str, enum.Enum):
     """Session state."""
 
     UNDEFINED = "undefined"
@@ -53,6 +66,9 @@ class PartialSession(pydantic.BaseModel):
     ticket: typing.Optional[genshin.models.ActionTicket] = None
     """Email verification data."""
 
+    model_config = pydantic.ConfigDict(frozen=True)
+    """Partial session is a read-only view of the session."""
+
 
 class Session(pydantic.BaseModel):
     """Session class."""
@@ -94,9 +110,12 @@ class Session(pydantic.BaseModel):
     login_result: typing.Optional[genshin.models.AppLoginResult] = None
     """The login result added to session after successful login."""
 
+    model_config = pydantic.ConfigDict(validate_assignment=False)
+    """Session is changed on every state transition, assignments are not validated."""
+
     def get_partial(self) -> PartialSession:
         """Get a partial (safe) session."""
-        return PartialSession(
+        return PartialSession.model_construct(  # Values are already validated by the session
             id=self.id,
             state=self.state,
             language=self.language,
@@ -104,18 +123,10 @@ class Session(pydantic.BaseModel):
             ticket=self.ticket
         )
 
-    @pydantic.field_validator("expiration_time", mode="before")
-    @classmethod
-    def __datetime_to_float(cls, v: typing.Any) -> str:
-        """Convert datetime to float."""
-        if isinstance(v, datetime.datetime):
-            return v.timestamp()
-        return v
-
     @pydantic.field_validator("mmt", "ticket", mode="before")
     @classmethod
     def __str_to_dict(cls, v: typing.Any) -> typing.Optional[typing.Dict[typing.Any, typing.Any]]:
         """Convert string representation of model to dict."""
         if isinstance(v, str):
-            return json.loads(v)
+            return _parse_json(v)
         return v
@@ -1,18 +1,42 @@
 """File processor module. Used to load files and insert data into them."""
+import functools
+import os
+import re
+import typing
+
 from ..models import Localization
 
 
-__all__ = ["process"]
+__all__ = ["process", "render"]
 
 
-def process(path: str, language: str, localization: Localization, **kwargs) -> str:
-    """Process a file, insert localization and data into it."""
+_PLACEHOLDER = re.compile(r"\{\{([^{}]+)\}\}")
+"""Placeholder for localization and data in the content, e.g. `{{login_title}}`."""
+
+
+@functools.lru_cache(maxsize=32)
+def _split(content: str) -> typing.Tuple[str, ...]:
+    """Split content into text chunks and placeholder names between them (at odd indexes)."""
+    return tuple(_PLACEHOLDER.split(content))
+
+
+def render(content: str, language: str, localization: Localization, **kwargs) -> str:
+    """Insert localization and data into already loaded content."""
+    values = {**localization.texts(language), **{key: str(value) for key, value in kwargs.items()}}
+    parts = list(_split(content))
+    for i in range(1, len(parts), 2):
+        key = parts[i]
+        parts[i] = values.get(key, "{{" + key + "}}")  # Unknown placeholders are left as they are
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=32)
+def _read(path: str, mtime: float) -> str:
+    """Read a file. Cached by path and modification time, so changed files are read again."""
     with open(path, "r", encoding="utf-8") as file:
-        content = file.read()
+        return file.read()
 
-    for key, value in localization.model_dump().items():
-        content = content.replace("{{" + key + "}}", value.get(language, ""))
-    for key, value in kwargs.items():
-        content = content.replace("{{" + key + "}}", str(value))
 
-    return content
+def process(path: str, language: str, localization: Localization, **kwargs) -> str:
+    """Process a file, insert localization and data into it."""
+    return render(_read(path, os.stat(path).st_mtime), language, localization, **kwargs)
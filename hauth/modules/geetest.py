@@ -4,29 +4,31 @@
 __all__ = ["get_lang_from_language"]
 
 
+_GEETEST_LANGS = frozenset({
+    "zh-cn",
+    "zh-hk",
+    "zh-tw",
+    "en",
+    "ja",
+    "ko",
+    "id",
+    "ru",
+    "ar",
+    "es",
+    "pt-pt",
+    "fr",
+    "de",
+    "th",
+    "tr",
+    "vi",
+    "ta",
+    "it",
+    "bn",
+    "mr"
+})
+"""Languages supported by geetest."""
+
+
 def get_lang_from_language(language: str) -> str:
     """Get geetest lang from language."""
-    if language in [
-        "zh-cn",
-        "zh-hk",
-        "zh-tw",
-        "en",
-        "ja",
-        "ko",
-        "id",
-        "ru",
-        "ar",
-        "es",
-        "pt-pt",
-        "fr",
-        "de",
-        "th",
-        "tr",
-        "vi",
-        "ta",
-        "it",
-        "bn",
-        "mr"
-    ]:
-        return language
-    return "en"
+    return language if language in _GEETEST_LANGS else "en"
@@ -1,21 +1,67 @@
 """HAuth utility functions."""
+import asyncio
+import functools
 import typing
 
+import pydantic_core
+
+try:
+    import orjson
+except ImportError:
+    _orjson_installed = False
+else:
+    _orjson_installed = True
+
 from ..models import ReqLogin, ReqMMTResult, ReqEmailVerification
 
 
-__all__ = ["request_data_to_model"]
+__all__ = ["request_data_to_model", "json_dumps", "json_loads", "coalesce"]
+
+
+_REQUEST_MODELS: typing.Dict[str, typing.Type[typing.Union[ReqLogin, ReqMMTResult, ReqEmailVerification]]] = {
+    "account": ReqLogin,
+    "mmt_result": ReqMMTResult,
+    "code": ReqEmailVerification,
+}
+"""Request data models by the key identifying them, in order of priority."""
 
 
 def request_data_to_model(data: typing.Union[None, dict]) -> typing.Union[None, ReqLogin, ReqMMTResult, ReqEmailVerification]:
     """Convert request data to model."""
     if data is None:
         return data
-    elif "account" in data:
-        return ReqLogin(**data)
-    elif "mmt_result" in data:
-        return ReqMMTResult(**data)
-    elif "code" in data:
-        return ReqEmailVerification(**data)
-    else:
-        raise ValueError("Invalid request data.")
+    for key, model in _REQUEST_MODELS.items():
+        if key in data:
+            return model.model_validate(data)
+    raise ValueError("Invalid request data.")
+
+
+def json_dumps(obj: typing.Any) -> bytes:
+    """Serialize object to JSON bytes. Uses orjson if it is installed. Non-string dict keys are converted to strings."""
+    if _orjson_installed:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return pydantic_core.to_json(obj)
+
+
+def json_loads(data: typing.Union[str, bytes]) -> typing.Any:
+    """Deserialize JSON string or bytes. Uses orjson if it is installed."""
+    if _orjson_installed:
+        return orjson.loads(data)
+    return pydantic_core.from_json(data)
+
+
+def coalesce(func: typing.Callable[..., typing.Awaitable[typing.Any]]) -> typing.Callable[..., typing.Awaitable[typing.Any]]:
+    """Decorator to make concurrent calls of a coroutine function with the same arguments share a single call.
+
+    Arguments must be hashable. Results are not cached after the call is done.
+    """
+    calls: typing.Dict[typing.Tuple[typing.Any, ...], asyncio.Future] = {}
+
+    @functools.wraps(func)
+    async def wrapper(*args):
+        call = calls.get(args)
+        if call is None:
+            call = calls[args] = asyncio.ensure_future(func(*args))
+            call.add_done_callback(lambda _: calls.pop(args, None))
+        return await asyncio.shield(call)  # Cancelling one caller must not cancel the others
+    return wrapper
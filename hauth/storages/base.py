@@ -1,5 +1,6 @@
 """In-memory sessions storage."""
 import abc
+import asyncio
 import typing
 
 import genshin
@@ -28,6 +29,13 @@ class SessionsStorage(abc.ABC):
     initialized: bool = False
     """Whether the storage is initialized."""
 
+    def _report_expire_error(self, session: Session, error: BaseException) -> None:
+        """Report an exception raised by `on_expire` to the event loop's exception handler."""
+        asyncio.get_running_loop().call_exception_handler({
+            "message": f"Exception in on_expire callback for session {session.id!r}",
+            "exception": error,
+        })
+
     @abc.abstractmethod
     async def _cleanup_expired_sessions(self) -> None:
         """Coroutine function to clean up expired items."""
@@ -1,7 +1,7 @@
 """In-memory sessions storage."""
 import asyncio
-import random
-import string
+import heapq
+import secrets
 import time
 import typing
 
@@ -31,44 +31,92 @@ class MemorySessionsStorage(SessionsStorage):
             on_expire (typing.Optional[typing.Callable[[Session], typing.Awaitable[None]]]): A callback function that is called when session expires.
             ttl (typing.Optional[float]): The TTL for sessions in seconds.
             session_id_length (typing.Optional[int]): The length of randomly generated ID of each session.
-            cleanup_interval (typing.Optional[float]): The interval in seconds to clean up expired sessions.
+            cleanup_interval (typing.Optional[float]): The minimum interval in seconds between cleanups of expired sessions.
+                Sessions expiring within this interval are cleaned up together.
         """
         self.ttl = ttl
         self.on_expire = on_expire
         self.session_id_length = session_id_length
         self.cleanup_interval = cleanup_interval
 
-        self._storage: typing.Mapping[str, Session] = {}
+        self._storage: typing.Dict[str, Session] = {}
         """The in-memory storage for the sessions."""
+        self._expirations: typing.List[typing.Tuple[float, str]] = []
+        """Min-heap of session expiration times and IDs.
+
+        Entries are not removed when sessions are deleted or rescheduled. Outdated
+        entries are skipped when popped, or dropped when the heap is compacted.
+        """
+        self._scheduled: typing.Dict[str, float] = {}
+        """Expiration time of the live heap entry by session ID."""
+        self._wakeup: typing.Optional[asyncio.Event] = None
+        """Set when a session expiring before all the others is added, to reschedule the cleanup."""
+
+    def _schedule_expiration(self, id: str, session: Session) -> None:
+        """Add the session to the expiration heap, unless it is already scheduled at its expiration time."""
+        if session.expiration_time is None:
+            self._scheduled.pop(id, None)
+            return
+        if self._scheduled.get(id) == session.expiration_time:
+            return
+
+        self._scheduled[id] = session.expiration_time
+        entry = (session.expiration_time, id)
+        heapq.heappush(self._expirations, entry)
+        if len(self._expirations) > 2 * len(self._scheduled) + 64:  # Mostly outdated entries
+            self._expirations = [(expiration_time, key) for key, expiration_time in self._scheduled.items()]
+            heapq.heapify(self._expirations)
+        if self._expirations[0] == entry and self._wakeup is not None:
+            self._wakeup.set()
 
     async def _cleanup_expired_sessions(self) -> None:
         while True:
-            expired_keys = [
-                key for key, session in self._storage.items() 
-                if session.expiration_time is not None and time.time() > session.expiration_time
-            ]
-            for key in expired_keys:
-                session = self._storage.pop(key)
-                if self.on_expire:
-                    await self.on_expire(session)
-            await asyncio.sleep(self.cleanup_interval)
+            now = time.time()
+            expired_sessions = []
+            while self._expirations and self._expirations[0][0] < now:
+                expiration_time, key = heapq.heappop(self._expirations)
+                if self._scheduled.get(key) != expiration_time:
+                    continue  # Deleted or rescheduled
+                del self._scheduled[key]
+                session = self._storage[key]
+                if session.expiration_time != expiration_time:  # Expiration time was changed in place
+                    self._schedule_expiration(key, session)
+                    continue
+                del self._storage[key]
+                expired_sessions.append(session)
+
+            if self.on_expire and expired_sessions:
+                # A failing callback must not stop the others or the cleanup
+                results = await asyncio.gather(*map(self.on_expire, expired_sessions), return_exceptions=True)
+                for session, result in zip(expired_sessions, results):
+                    if isinstance(result, Exception):
+                        self._report_expire_error(session, result)
+
+            # Sleep until the next session expires, or until a session expiring earlier is added
+            self._wakeup.clear()
+            timeout = None
+            if self._expirations:
+                timeout = max(self.cleanup_interval, self._expirations[0][0] - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
 
     async def initialize(self) -> None:
+        self._wakeup = asyncio.Event()  # Created here to bind it to the running loop
         asyncio.create_task(self._cleanup_expired_sessions())
         self.initialized = True
 
     @check_initialized
     async def get_session(self, id: str) -> typing.Union[Session, None]:
-        return self._storage.get(id, None)
+        return self._storage.get(id)
 
     @check_initialized
     async def _generate_id(self) -> str:
-        chars = string.ascii_letters + string.digits
-        existing_ids = set(self._storage.keys())
-
         while True:
-            new_id = "".join(random.choices(chars, k=self.session_id_length))
-            if new_id not in existing_ids:
+            # `token_urlsafe` returns ~1.3 characters per byte, so `session_id_length` bytes are always enough
+            new_id = secrets.token_urlsafe(self.session_id_length)[:self.session_id_length]
+            if new_id not in self._storage:
                 return new_id
 
     @check_initialized
@@ -95,13 +143,15 @@ class MemorySessionsStorage(SessionsStorage):
             login_result=login_result
         )
         self._storage[sid] = session
+        self._schedule_expiration(sid, session)
         return session
 
     @check_initialized
     async def update_session(self, id: str, session: Session) -> None:
         self._storage[id] = session
+        self._schedule_expiration(id, session)  # In case the expiration time was changed
 
     @check_initialized
     async def delete_session(self, id: str) -> None:
-        if id in self._storage:
-            del self._storage[id]
+        self._storage.pop(id, None)
+        self._scheduled.pop(id, None)
@@ -1,8 +1,5 @@
 import asyncio
-import datetime
-import json
-import random
-import string
+import secrets
 import typing
 
 try:
@@ -15,12 +12,106 @@ else:
 import genshin
 
 from ..models import Session, State
+from ..modules.utility import json_dumps, json_loads
 from . import SessionsStorage, check_initialized
 
 
 __all__ = ["PostgresSessionsStorage"]
 
 
+_CLEANUP_BATCH_SIZE = 1000
+"""Maximum number of expired sessions deleted by a single cleanup query."""
+
+_MAX_CLEANUP_DELAY = 30.0
+"""Maximum number of seconds the cleanup sleeps, waiting for the next session to expire.
+
+Bounds how long sessions created by other processes (e.g. with a shorter TTL) can stay past their expiration.
+"""
+
+_SESSION_COLUMNS = "id, state, data, language, account, password, mmt, ticket, expiration_time, login_result"
+"""Columns of the sessions table, in the order of `Session` fields."""
+
+_EXPIRATION_EPOCH = "EXTRACT(EPOCH FROM expiration_time::timestamptz)::float8"
+"""Expiration time as a Unix timestamp.
+
+Read the same way it is written by `to_timestamp`: tables created with a `TIMESTAMP`
+column are cast in the database session's time zone both ways, so the value round-trips.
+"""
+
+_SESSION_SELECT = _SESSION_COLUMNS.replace("expiration_time", f"{_EXPIRATION_EPOCH} AS expiration_time")
+"""Columns of the sessions table to select, with the expiration time as a Unix timestamp."""
+
+_SQL_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        state TEXT,
+        data JSONB,
+        language TEXT,
+        account TEXT,
+        password TEXT,
+        mmt JSONB,
+        ticket JSONB,
+        expiration_time TIMESTAMPTZ,
+        login_result JSONB
+    )
+"""
+_SQL_CREATE_EXPIRATION_INDEX = "CREATE INDEX IF NOT EXISTS sessions_expiration_time_idx ON sessions (expiration_time)"
+"""Lets the cleanup find expired sessions without scanning the whole table."""
+_SQL_DELETE_EXPIRED = f"""
+    DELETE FROM sessions WHERE id IN (
+        SELECT id FROM sessions WHERE expiration_time < NOW() LIMIT $1
+    ) RETURNING {_SESSION_SELECT}
+"""
+_SQL_NEXT_EXPIRATION = "SELECT EXTRACT(EPOCH FROM MIN(expiration_time) - NOW()) FROM sessions"
+"""Seconds until the next session expires."""
+_SQL_GET = f"SELECT {_SESSION_SELECT} FROM sessions WHERE id = $1"
+_SQL_INSERT = f"""
+    INSERT INTO sessions ({_SESSION_COLUMNS}) VALUES (
+        $1, $2, $3, $4, $5, $6, $7, $8, NOW() + INTERVAL '1 second' * $9, $10
+    ) ON CONFLICT (id) DO NOTHING RETURNING {_EXPIRATION_EPOCH} AS expiration_time
+"""
+_SQL_UPDATE = """
+    UPDATE sessions SET
+        state = $1,
+        data = $2,
+        language = $3,
+        account = $4,
+        password = $5,
+        mmt = $6,
+        ticket = $7,
+        expiration_time = to_timestamp($8),
+        login_result = $9
+    WHERE id = $10
+"""
+_SQL_DELETE = "DELETE FROM sessions WHERE id = $1"
+
+_EXPIRE_CONCURRENCY = 16
+"""Maximum number of `on_expire` callbacks running at the same time."""
+
+_EXPIRE_QUEUE_SIZE = 10_000
+"""Maximum number of expired sessions waiting for `on_expire` to be called.
+
+When the queue is full, the cleanup waits until there is a place in the queue.
+"""
+
+
+def _encode_jsonb(value: typing.Any) -> str:
+    """Encode JSONB column value. Strings are already encoded JSON (e.g. dumped models) and are passed as is."""
+    if isinstance(value, str):
+        return value
+    return json_dumps(value).decode()
+
+
+async def _init_connection(conn: "asyncpg.Connection") -> None:
+    """Set up a new pool connection. JSONB columns are (de)serialized by the connection, using orjson if installed."""
+    await conn.set_type_codec("jsonb", encoder=_encode_jsonb, decoder=json_loads, schema="pg_catalog")
+
+
+def _record_to_session(record: "asyncpg.Record") -> Session:
+    """Build a session from a database record selected with `_SESSION_SELECT`."""
+    return Session(**dict(record))
+
+
 class PostgresSessionsStorage(SessionsStorage):
     """PostgreSQL sessions storage."""
 
@@ -40,7 +131,10 @@ class PostgresSessionsStorage(SessionsStorage):
             on_expire (typing.Optional[typing.Callable[[Session], typing.Awaitable[None]]]): A callback function that is called when session expires.
             ttl (typing.Optional[float]): The TTL for sessions in seconds.
             session_id_length (typing.Optional[int]): The length of randomly generated ID of each session.
-            cleanup_interval (typing.Optional[float]): The interval in seconds to clean up expired sessions.
+            cleanup_interval (typing.Optional[float]): The minimum interval in seconds between cleanups of expired sessions.
+                Between cleanups, the storage sleeps until the next session expires, but at most 30 seconds
+                or `ttl`, whichever is shorter. Sessions created in the meantime by other processes
+                with a shorter `ttl` may therefore be cleaned up that much later than they expire.
         """
         self.ttl = ttl
         self.on_expire = on_expire
@@ -50,59 +144,68 @@ class PostgresSessionsStorage(SessionsStorage):
         self.dns = dns
         """PostgreSQL connection string."""
 
+        self._expired: typing.Optional[asyncio.Queue] = None
+        """Queue of expired sessions waiting for `on_expire` to be called."""
+
+    async def _run_on_expire(self) -> None:
+        """Coroutine function to call `on_expire` for queued expired sessions one by one."""
+        while True:
+            session = await self._expired.get()
+            if self.on_expire:
+                try:
+                    await self.on_expire(session)
+                except Exception as e:  # Reported, but keeps the worker alive
+                    self._report_expire_error(session, e)
+
     async def _cleanup_expired_sessions(self) -> None:
+        loop = asyncio.get_running_loop()
         while True:
-            async with self.pool.acquire() as conn:
-                async with conn.transaction():
-                    expired_sessions = await conn.fetch(
-                        "DELETE FROM sessions WHERE expiration_time < NOW() RETURNING *"
-                    )
-                    for session in expired_sessions:
-                        if self.on_expire:
-                            await self.on_expire(Session(**session))
-            await asyncio.sleep(self.cleanup_interval)
+            started = loop.time()
+            expired_sessions = await self.pool.fetch(_SQL_DELETE_EXPIRED, _CLEANUP_BATCH_SIZE)
+            if self.on_expire:  # Callbacks are run by the workers, slow ones do not delay the cleanup
+                for session in expired_sessions:
+                    await self._expired.put(_record_to_session(session))
+            if len(expired_sessions) == _CLEANUP_BATCH_SIZE:  # There are more expired sessions left
+                continue
+
+            # Sleep until the next session expires. Sessions created in the meantime expire
+            # after `ttl` if this process created them, so they are not missed. Those created
+            # by processes with a shorter TTL wait at most `_MAX_CLEANUP_DELAY`.
+            next_expiration = await self.pool.fetchval(_SQL_NEXT_EXPIRATION)
+            delay = min(self.ttl or _MAX_CLEANUP_DELAY, _MAX_CLEANUP_DELAY)
+            if next_expiration is not None:
+                delay = min(delay, float(next_expiration))
+
+            # Cleanups start at least `cleanup_interval` apart, however long they take
+            next_cleanup = max(started + self.cleanup_interval, loop.time() + delay)
+            await asyncio.sleep(next_cleanup - loop.time())
 
     async def initialize(self) -> None:
         if not _asyncpg_installed:
             raise ImportError("Postgres storage requires asyncpg to be installed: `pip install asyncpg`.")
 
-        self.pool = await asyncpg.create_pool(self.dns)
+        self.pool = await asyncpg.create_pool(self.dns, init=_init_connection)
         async with self.pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id TEXT PRIMARY KEY,
-                    state TEXT,
-                    data JSONB,
-                    language TEXT,
-                    account TEXT,
-                    password TEXT,
-                    mmt JSONB,
-                    ticket JSONB,
-                    expiration_time TIMESTAMP,
-                    login_result JSONB
-                )
-            """)
+            await conn.execute(_SQL_CREATE_TABLE)
+            await conn.execute(_SQL_CREATE_EXPIRATION_INDEX)
+        self._expired = asyncio.Queue(maxsize=_EXPIRE_QUEUE_SIZE)
+        for _ in range(_EXPIRE_CONCURRENCY):
+            asyncio.create_task(self._run_on_expire())
         asyncio.create_task(self._cleanup_expired_sessions())
         self.initialized = True
 
     @check_initialized
     async def get_session(self, id: str) -> typing.Union[Session, None]:
-        async with self.pool.acquire() as conn:
-            session = await conn.fetchrow("SELECT * FROM sessions WHERE id = $1", id)
-            if session:
-                return Session(**session)
-            else:
-                return None
+        session = await self.pool.fetchrow(_SQL_GET, id)
+        if session:
+            return _record_to_session(session)
+        else:
+            return None
 
     @check_initialized
     async def _generate_id(self) -> str:
-        chars = string.ascii_letters + string.digits
-        async with self.pool.acquire() as conn:
-            while True:
-                new_id = "".join(random.choices(chars, k=self.session_id_length))
-                session = await conn.fetchrow("SELECT * FROM sessions WHERE id = $1", new_id)
-                if not session:
-                    return new_id
+        # Uniqueness is checked by the primary key when the session is inserted
+        return secrets.token_urlsafe(self.session_id_length)[:self.session_id_length]
 
     @check_initialized
     async def create_session(
@@ -115,17 +218,13 @@ class PostgresSessionsStorage(SessionsStorage):
         ticket: typing.Optional[genshin.models.ActionTicket] = None,
         login_result: typing.Optional[genshin.models.AppLoginResult] = None
     ) -> Session:
-        sid = await self._generate_id()
-        async with self.pool.acquire() as conn:
-            created_session = await conn.fetchrow(
-                """INSERT INTO sessions (
-                    id, state, data, language, account, password, mmt, ticket, expiration_time, login_result
-                ) VALUES (
-                    $1, $2, $3, $4, $5, $6, $7, $8, NOW() + INTERVAL '1 second' * $9, $10
-                ) RETURNING *""",
+        while True:
+            sid = await self._generate_id()
+            created_session = await self.pool.fetchrow(
+                _SQL_INSERT,
                 sid,
                 State.UNDEFINED.value,
-                json.dumps(data) if data else None,
+                data or None,
                 language,
                 account,
                 password,
@@ -134,36 +233,38 @@ class PostgresSessionsStorage(SessionsStorage):
                 self.ttl,
                 login_result.model_dump_json() if login_result else None,
             )
-            return Session(**created_session)
+            if created_session:  # Otherwise the ID is already taken
+                break
+
+        # Built from the values just written, so the JSONB columns do not need to be read back
+        return Session(
+            id=sid,
+            data=data or None,
+            language=language,
+            account=account,
+            password=password,
+            mmt=mmt,
+            ticket=ticket,
+            expiration_time=created_session["expiration_time"],
+            login_result=login_result
+        )
 
     @check_initialized
     async def update_session(self, id: str, session: Session) -> None:
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                """UPDATE sessions SET
-                    state = $1,
-                    data = $2,
-                    language = $3,
-                    account = $4,
-                    password = $5,
-                    mmt = $6,
-                    ticket = $7,
-                    expiration_time = $8,
-                    login_result = $9
-                WHERE id = $10""",
-                session.state.value,
-                json.dumps(session.data) if session.data else None,
-                session.language,
-                session.account,
-                session.password,
-                session.mmt.model_dump_json() if session.mmt else None,
-                session.ticket.model_dump_json() if session.ticket else None,
-                datetime.datetime.fromtimestamp(session.expiration_time) if session.expiration_time else None,
-                session.login_result.model_dump_json() if session.login_result else None,
-                id,
-            )
+        await self.pool.execute(
+            _SQL_UPDATE,
+            session.state.value,
+            session.data or None,
+            session.language,
+            session.account,
+            session.password,
+            session.mmt.model_dump_json() if session.mmt else None,
+            session.ticket.model_dump_json() if session.ticket else None,
+            session.expiration_time,
+            session.login_result.model_dump_json() if session.login_result else None,
+            id,
+        )
 
     @check_initialized
     async def delete_session(self, id: str) -> None:
-        async with self.pool.acquire() as conn:
-            await conn.execute("DELETE FROM sessions WHERE id = $1", id)
+        await self.pool.execute(_SQL_DELETE, id)